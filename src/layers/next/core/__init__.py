@@ -2,4 +2,5 @@
 Core of the Binary Scheme language.
 """
 from .builtins import BSType, BSParam, BSObject, BSStr, BSInt, BSNull
-__all__ = ['BSType', 'BSParam', 'BSObject', 'BSStr', 'BSInt', 'BSNull']
+from .transcoder import BSTranscoder
+__all__ = ['BSType', 'BSParam', 'BSObject', 'BSStr', 'BSInt', 'BSNull', 'BSTranscoder']
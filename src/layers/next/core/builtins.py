@@ -18,6 +18,7 @@ class BSMeta:
     def __init__(self) -> None:
         self.used_constructors: dict[str, BSType] = {} # constructor_name -> type
         self.types_constructors: dict[str, list[BSType]] = {} # type_name -> list of constructors
+        self.constructors_hashes: dict[str, str] = {} # constructor_name -> CRC32 (snapshots only)
 
     # pylint: disable-next = unused-private-member
     def __force_clear(self) -> None:
@@ -25,6 +26,7 @@ class BSMeta:
         """
         self.used_constructors: dict[str, BSType] = {} # constructor_name -> type
         self.types_constructors: dict[str, list[BSType]] = {} # type_name -> list of constructors
+        self.constructors_hashes: dict[str, str] = {} # constructor_name -> CRC32 (snapshots only)
         # raise RuntimeWarning("Cleaned.")
 
     def has_constructor(self, constructor_name: str) -> BSType | None:
@@ -84,6 +86,81 @@ class BSMeta:
         """
         return self.types_constructors.get(type_name, [])
 
+    def snapshot(self, reset: bool = False) -> BSMeta:
+        """Returns a copy of the current registry with CRC32 hashes
+        of all constructors captured at the moment of the call.
+        Hashes depend on the registry state (e.g. `User` becomes `User.user`
+        when the second constructor is declared), so take the snapshot
+        after the whole scheme version has been declared.
+
+        Without `reset` only `hash_of()` and `constructors_hashes` of the snapshot
+        are stable: the types are shared with the registry, so their `name` and
+        `hash` follow its later changes.
+
+        With `reset` the version is closed: names of its types are frozen
+        (so their `name`, `hash` and `convert_to_scheme()` stay the same) and
+        the registry is cleared (except built-in types), so the next version
+        of the scheme can declare the same constructors again.
+
+        **Example**:
+        ```python
+        # ... declare the old version of the scheme ...
+        old = BS.snapshot(reset=True)
+        # ... declare the new version of the scheme ...
+        new = BS.snapshot(reset=True)
+        ```
+
+        Args:
+            reset (bool): freeze the types and clear the registry
+
+        Returns:
+            BSMeta: copy of the registry (do not declare types against it)
+        """
+        meta = BSMeta()
+        meta.used_constructors = dict(self.used_constructors)
+        meta.types_constructors = {
+            type_name: list(constructors)
+            for type_name, constructors in self.types_constructors.items()
+        }
+        meta.constructors_hashes = {
+            constructor_name: _type.hash
+            for constructor_name, _type in self.used_constructors.items()
+        }
+        if reset:
+            names = {
+                constructor_name: _type.name
+                for constructor_name, _type in self.used_constructors.items()
+                if not _type.is_builtin_type
+            }
+            for constructor_name, name in names.items():
+                # pylint: disable-next = protected-access
+                self.used_constructors[constructor_name]._frozen_name = name
+            self.used_constructors = {
+                constructor_name: _type
+                for constructor_name, _type in self.used_constructors.items()
+                if _type.is_builtin_type
+            }
+            self.types_constructors = {}
+            for _type in self.used_constructors.values():
+                # pylint: disable-next = protected-access
+                self.types_constructors.setdefault(_type._name, []).append(_type)
+        return meta
+
+    def hash_of(self, _type: BSType) -> str:
+        """Returns CRC32 hash of the constructor as it was when
+        the snapshot was taken (or the current one for built-in types
+        and registries without snapshot)
+
+        Args:
+            _type (BSType): non-complex type
+
+        Returns:
+            str: CRC32 hash of the constructor
+        """
+        if _type.is_builtin_type:
+            return _type.hash
+        return self.constructors_hashes.get(_type.constructor_name) or _type.hash
+
 BS = BSMeta() # the one and only instance of BSMeta()
 
 
@@ -121,6 +198,7 @@ class BSType:
         self.is_builtin_type = is_builtin_type
         self.is_comlex_type = is_comlex_type
         self.optional_types = optional_types
+        self._frozen_name: str | None = None # set by BSMeta.snapshot(reset=True)
 
         # if type is complex (like int | null), we don't need to emphasize a constructor name
         if not self.is_comlex_type:
@@ -148,7 +226,8 @@ class BSType:
             - `Type.constructor` if there are several constructors
 
         Returns:
-            str: described above
+            str: described above (frozen if the scheme version
+            has been closed by `BS.snapshot(reset=True)`)
         """
         if self.is_comlex_type:
             sorted_type_names: list[BSType] = list(sorted(
@@ -156,6 +235,8 @@ class BSType:
                 key=lambda _type: _type.name
             ))
             return " | ".join(_type.name for _type in sorted_type_names)
+        if self._frozen_name is not None:
+            return self._frozen_name
 
         variants = len(BS.get_constructors_of_type(self._name))
         # print(BS.get_constructors_of_type(self._name))
@@ -0,0 +1,276 @@
+"""
+Transcoding of BSObjects between two versions of the scheme
+"""
+from __future__ import annotations
+from operator import itemgetter
+from typing import Callable
+from .builtins import BSMeta, BSObject, BSType, BSNull
+
+Transcoder = Callable[[BSObject], BSObject]
+
+FieldGetter = Callable[[dict[str, BSObject]], BSObject]
+
+# null objects carry no data, so all new nullable fields share the same one
+_NULL_OBJECT = BSObject(BSNull, {})
+
+
+def _flatten(_type: BSType) -> list[BSType]:
+    """Returns all non-complex variants of the type
+
+    Args:
+        _type (BSType): simple or complex (like `int | null`) type
+
+    Returns:
+        list[BSType]: list of simple types
+    """
+    if not _type.is_comlex_type:
+        return [_type]
+    variants = []
+    for optional_type in _type.optional_types:
+        variants.extend(_flatten(optional_type))
+    return variants
+
+
+class BSTranscoder:
+    """Precompiled transcoder of BSObjects from the `old` version of the scheme
+    to the `new` one. Constructors are matched by their names and
+    every (old CRC32 -> new CRC32) pair gets its own transcoder, which reuses
+    unchanged values (including whole subtrees) and converts only the fields
+    that differ: removed fields are dropped, new nullable fields are set to `null`
+    and values of changed types are transcoded by the nested transcoders
+    bound at compile time.
+    The objects are neither validated nor rebuilt from Python objects.
+
+    Pairs that can't be transcoded are not compiled and `get()` returns `None`
+    for them. These are pairs where the new version has a new non-nullable field,
+    a field loses some of the variants of its type (e.g. `null | str` -> `str`
+    or `int` -> `str`) or a nested pair can't be transcoded.
+    For downgrading create a second transcoder with swapped registries.
+
+    **Example**:
+    ```python
+    # ... declare the old version of the scheme ...
+    old = BS.snapshot(reset=True)
+    # ... declare the new version of the scheme ...
+    new = BS.snapshot(reset=True)
+    upgrade, downgrade = BSTranscoder(old, new), BSTranscoder(new, old)
+    ```
+    """
+    def __init__(self, old: BSMeta, new: BSMeta) -> None:
+        self.old = old
+        self.new = new
+        self.transcoders: dict[tuple[str, str], Transcoder] = {} # (old hash, new hash) -> transcoder
+        self.routes: dict[str, str] = {} # old hash -> new hash
+        self._compile()
+
+    def _compile(self) -> None:
+        """Diffs the registries and compiles transcoders for all pairs of constructors
+        """
+        plans: dict[tuple[str, str], tuple[BSType, list[tuple]]] = {}
+        for constructor_name, old_type in self.old.used_constructors.items():
+            new_type = self.new.used_constructors.get(constructor_name)
+            if new_type is None or old_type.is_builtin_type:
+                continue
+            fields = self._plan(old_type, new_type)
+            if fields is not None:
+                key = (self.old.hash_of(old_type), self.new.hash_of(new_type))
+                plans[key] = (new_type, fields)
+
+        # the pair can't be transcoded if any of its nested pairs can't be
+        changed = True
+        while changed:
+            changed = False
+            for key in list(plans):
+                if not all(
+                    route is None or route in plans
+                    for _, routes in plans[key][1] if routes is not None
+                    for route in routes.values()
+                ):
+                    del plans[key]
+                    changed = True
+
+        # the pair is identical if the constructor is not changed and all its
+        # fields are either built-in or identical themselves (CRC32 covers only
+        # the names of the fields types, so nested types may still differ)
+        identical = {key for key in plans if key[0] == key[1]}
+        changed = True
+        while changed:
+            changed = False
+            for key in list(identical):
+                if not all(
+                    self._is_copy(routes, identical) for _, routes in plans[key][1]
+                ):
+                    identical.discard(key)
+                    changed = True
+
+        # nested transcoders are bound after all of them are created,
+        # because the scheme may contain recursive types
+        bindings: list[tuple[list, list]] = []
+        for key, (new_type, fields) in plans.items():
+            self.routes[key[0]] = key[1]
+            if key in identical:
+                self.transcoders[key] = lambda obj: obj
+                continue
+            getters: list[tuple[str, FieldGetter]] = []
+            bindings.append((getters, fields))
+            self.transcoders[key] = self._compile_pair(new_type, getters)
+        for getters, fields in bindings:
+            getters.extend(
+                (name, self._compile_field(name, routes, identical))
+                for name, routes in fields
+            )
+
+    def _plan(self, old_type: BSType, new_type: BSType) -> list[tuple] | None:
+        """Builds the list of field routes for the pair of constructors
+
+        Args:
+            old_type (BSType): constructor from the old version
+            new_type (BSType): constructor with the same name from the new version
+
+        Returns:
+            list[tuple] | None: `(field name, routes)` for every field of the new
+            constructor (routes are None for new nullable fields)
+            or None if the pair can't be transcoded
+        """
+        old_params = {param.name: param for param in old_type.params}
+        fields = []
+        for param in new_type.params:
+            new_variants = {
+                variant.constructor_name: variant for variant in _flatten(param.type)
+            }
+            if param.name not in old_params:
+                if BSNull.constructor_name not in new_variants:
+                    return None
+                fields.append((param.name, None))
+                continue
+            # old constructor name -> None (copy) or (old hash, new hash)
+            routes: dict[str, tuple[str, str] | None] = {}
+            for variant in _flatten(old_params[param.name].type):
+                new_variant = new_variants.get(variant.constructor_name)
+                if new_variant is None:
+                    # the old value may not fit into the new field
+                    return None
+                if variant.is_builtin_type:
+                    routes[variant.constructor_name] = None
+                else:
+                    routes[variant.constructor_name] = (
+                        self.old.hash_of(variant), self.new.hash_of(new_variant)
+                    )
+            fields.append((param.name, routes))
+        return fields
+
+    @staticmethod
+    def _is_copy(routes: dict | None, identical: set[tuple[str, str]]) -> bool:
+        """Checks if the old value of the field can be reused as is
+
+        Args:
+            routes (dict | None): routes of the field
+            identical (set[tuple[str, str]]): pairs which don't need transcoding
+
+        Returns:
+            bool: can the value be copied
+        """
+        return routes is not None and all(
+            route is None or route in identical for route in routes.values()
+        )
+
+    def _compile_field(
+        self,
+        name: str,
+        routes: dict | None,
+        identical: set[tuple[str, str]]) -> FieldGetter:
+        """Creates the function returning the new value of the field
+        from the data of the old object. Must be called after
+        transcoders of all pairs are created.
+
+        Args:
+            name (str): field name
+            routes (dict | None): routes of the field (None for new nullable fields)
+            identical (set[tuple[str, str]]): pairs which don't need transcoding
+
+        Returns:
+            FieldGetter: function of the old object data
+        """
+        if routes is None:
+            return lambda data: _NULL_OBJECT
+        if self._is_copy(routes, identical):
+            return itemgetter(name)
+        nested: dict[str, Transcoder | None] = {
+            constructor_name: None if route is None or route in identical
+            else self.transcoders[route]
+            for constructor_name, route in routes.items()
+        }
+        if len(nested) == 1:
+            transcoder = next(iter(nested.values()))
+            return lambda data: transcoder(data[name])
+
+        def dispatch(data: dict[str, BSObject]) -> BSObject:
+            value = data[name]
+            # pylint: disable-next = protected-access
+            constructor_name = value._type.constructor_name
+            if constructor_name not in nested:
+                raise ValueError(
+                    f"Value of type {constructor_name} can't be stored in the field {name}"
+                )
+            transcoder = nested[constructor_name]
+            return value if transcoder is None else transcoder(value)
+        return dispatch
+
+    @staticmethod
+    def _compile_pair(
+        new_type: BSType,
+        getters: list[tuple[str, FieldGetter]]) -> Transcoder:
+        """Creates the transcoder of the pair. `getters` is filled
+        by `_compile()` after transcoders of all pairs are created
+        (nested transcoders are bound into the getters).
+
+        Args:
+            new_type (BSType): constructor from the new version
+            getters (list[tuple[str, FieldGetter]]): `(field name, getter)`
+
+        Returns:
+            Transcoder: function converting old BSObject to the new one
+        """
+        def transcode(obj: BSObject) -> BSObject:
+            data = obj.data
+            # BSObject[new_type] would hash the type (i.e. calculate CRC32) on every call
+            return BSObject(new_type, {name: getter(data) for name, getter in getters})
+        return transcode
+
+    def get(self, old_hash: str, new_hash: str) -> Transcoder | None:
+        """Returns compiled transcoder for the pair of constructors
+
+        Args:
+            old_hash (str): CRC32 of the constructor in the old version
+            new_hash (str): CRC32 of the constructor in the new version
+
+        Returns:
+            Transcoder | None: transcoder or None if the pair can't be transcoded
+        """
+        return self.transcoders.get((old_hash, new_hash))
+
+    def transcode(self, obj: BSObject) -> BSObject:
+        """Converts BSObject of the old version to the new one
+
+        Args:
+            obj (BSObject): object of the old version
+
+        Raises:
+            ValueError: raises if the object can't be transcoded
+
+        Returns:
+            BSObject: object of the new version
+        """
+        _type = obj._type  # pylint: disable = protected-access
+        if _type.is_builtin_type:
+            return obj
+        if self.old.used_constructors.get(_type.constructor_name) is not _type:
+            raise ValueError(
+                f"Constructor {_type.constructor_name} is not declared in the old version"
+            )
+        old_hash = self.old.hash_of(_type)
+        if old_hash not in self.routes:
+            raise ValueError(
+                f"There is no transcoder for {_type.constructor_name}#{old_hash}"
+            )
+        return self.transcoders[(old_hash, self.routes[old_hash])](obj)
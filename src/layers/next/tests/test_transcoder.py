@@ -0,0 +1,228 @@
+"""
+Tests for transcoding objects between versions of the scheme
+"""
+# pylint: disable=duplicate-code
+import pytest
+from core.builtins import BSType, BSParam, BSObject, BSStr, BSInt, BSNull, BS
+from core.transcoder import BSTranscoder
+
+
+def _to_python(obj):
+    """
+    Converts BSObject back to the Python object, so it can be validated
+    against the type (`validate()` accepts any BSObject of the simple type)
+    """
+    if obj._type is BSNull:  # pylint: disable = protected-access
+        return None
+    if obj._type.is_builtin_type:  # pylint: disable = protected-access
+        return obj.data["value"]
+    return {key: _to_python(value) for key, value in obj.data.items()}
+
+
+def _declare_old_version():
+    """
+    Old version: `user id: int, name: str = User;`
+    and `chat id: int, owner: User = Chat;`
+    """
+    user_type = BSType(
+        "User", [
+            BSParam("id", BSInt),
+            BSParam("name", BSStr)
+        ],
+        "user"
+    )
+    chat_type = BSType(
+        "Chat", [
+            BSParam("id", BSInt),
+            BSParam("owner", user_type)
+        ],
+        "chat"
+    )
+    return user_type, chat_type
+
+
+def _declare_new_version():
+    """
+    New version: `user id: int, username: null | str = User;`
+    and the same `chat id: int, owner: User = Chat;`
+    """
+    user_type = BSType(
+        "User", [
+            BSParam("id", BSInt),
+            BSParam("username", BSStr | BSNull)
+        ],
+        "user"
+    )
+    chat_type = BSType(
+        "Chat", [
+            BSParam("id", BSInt),
+            BSParam("owner", user_type)
+        ],
+        "chat"
+    )
+    return user_type, chat_type
+
+
+def test_upgrade_and_downgrade():
+    """
+    Testing transcoding of changed constructors and constructors
+    with the same CRC32, but changed nested types
+    """
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+    old_user, old_chat = _declare_old_version()
+    old = BS.snapshot(reset=True)
+    new_user, new_chat = _declare_new_version()
+    new = BS.snapshot(reset=True)
+
+    upgrade = BSTranscoder(old, new)
+    old_user_hash = old.constructors_hashes["user"]
+    new_user_hash = new.constructors_hashes["user"]
+    chat_hash = old.constructors_hashes["chat"]
+    assert old_user_hash != new_user_hash
+    assert upgrade.get(old_user_hash, new_user_hash) is not None
+    # `chat` constructor is the same, but `User` has been changed
+    assert chat_hash == new.constructors_hashes["chat"]
+    assert upgrade.get(chat_hash, chat_hash) is not None
+    # types of the closed version keep their hashes
+    assert old_user.hash == old_user_hash
+    assert new_user.hash == new_user_hash
+
+    user_obj = old_user.to_BS_object({"id": 42, "name": "Mark"})
+    chat_obj = old_chat.to_BS_object({"id": 1, "owner": user_obj})
+    new_chat_obj = upgrade.transcode(chat_obj)
+    assert new_chat_obj._type is new_chat  # pylint: disable = protected-access
+    assert new_chat_obj.data["id"] is chat_obj.data["id"]
+    new_user_obj = new_chat_obj.data["owner"]
+    assert new_user_obj._type is new_user  # pylint: disable = protected-access
+    assert new_user_obj.data["id"] is user_obj.data["id"]
+    assert "name" not in new_user_obj.data
+    assert new_user_obj.data["username"]._type is BSNull  # pylint: disable = protected-access
+    assert new_chat.validate(_to_python(new_chat_obj))
+
+    # `username` is nullable in the new version, but `name` is required
+    # in the old one, so neither `user` nor `chat` (which contains `User`)
+    # can be downgraded
+    downgrade = BSTranscoder(new, old)
+    assert downgrade.get(new_user_hash, old_user_hash) is None
+    assert downgrade.get(chat_hash, chat_hash) is None
+    with pytest.raises(ValueError):
+        downgrade.transcode(new_chat_obj)
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+
+
+def _declare_chat_version(user_params):
+    """
+    Version with `chat id: int, owner: User | Bot | null = Chat;`
+    """
+    user_type = BSType("User", user_params, "user")
+    bot_type = BSType("Bot", [BSParam("id", BSInt)], "bot")
+    chat_type = BSType(
+        "Chat", [
+            BSParam("id", BSInt),
+            BSParam("owner", user_type | bot_type | BSNull)
+        ],
+        "chat"
+    )
+    return user_type, bot_type, chat_type
+
+
+def test_dispatch_by_constructor():
+    """
+    Testing fields with several variants where only some of them changed
+    """
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+    old_user, old_bot, old_chat = _declare_chat_version([
+        BSParam("id", BSInt),
+        BSParam("name", BSStr)
+    ])
+    old = BS.snapshot(reset=True)
+    new_user, _, new_chat = _declare_chat_version([
+        BSParam("id", BSInt),
+        BSParam("username", BSStr | BSNull)
+    ])
+    new = BS.snapshot(reset=True)
+    upgrade = BSTranscoder(old, new)
+
+    user_obj = old_user.to_BS_object({"id": 42, "name": "Mark"})
+    new_chat_obj = upgrade.transcode(old_chat.to_BS_object({"id": 1, "owner": user_obj}))
+    assert new_chat_obj._type is new_chat  # pylint: disable = protected-access
+    assert new_chat_obj.data["owner"]._type is new_user  # pylint: disable = protected-access
+    assert new_chat.validate(_to_python(new_chat_obj))
+
+    # `Bot` and `null` are not changed, so they are reused as is
+    bot_obj = old_bot.to_BS_object({"id": 7})
+    new_chat_obj = upgrade.transcode(old_chat.to_BS_object({"id": 2, "owner": bot_obj}))
+    assert new_chat_obj.data["owner"] is bot_obj
+    assert new_chat.validate(_to_python(new_chat_obj))
+    null_obj = BSNull.to_BS_object(None)
+    new_chat_obj = upgrade.transcode(old_chat.to_BS_object({"id": 3, "owner": null_obj}))
+    assert new_chat_obj.data["owner"] is null_obj
+    assert new_chat_obj._type is new_chat  # pylint: disable = protected-access
+
+    # `int` is not a variant of the `owner` field
+    with pytest.raises(ValueError):
+        upgrade.transcode(BSObject(old_chat, {
+            "id": BSInt.to_BS_object(4),
+            "owner": BSInt.to_BS_object(4)
+        }))
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+
+
+def test_incompatible_fields():
+    """
+    Testing that pairs with narrowed or changed field types
+    and removed constructors are not compiled
+    """
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+    BSType("User", [BSParam("id", BSInt), BSParam("name", BSStr | BSNull)], "user")
+    BSType("Bot", [BSParam("id", BSInt)], "bot")
+    old = BS.snapshot(reset=True)
+    new_user = BSType("User", [BSParam("id", BSInt), BSParam("name", BSStr)], "user")
+    BSType("Bot", [BSParam("id", BSStr)], "bot")
+    new = BS.snapshot(reset=True)
+    BSType("User", [BSParam("id", BSInt), BSParam("name", BSStr | BSNull)], "user")
+    third = BS.snapshot(reset=True)
+
+    narrowing = BSTranscoder(old, new)
+    # `null | str` -> `str`
+    assert narrowing.get(
+        old.constructors_hashes["user"], new.constructors_hashes["user"]
+    ) is None
+    # `int` -> `str`
+    assert narrowing.get(
+        old.constructors_hashes["bot"], new.constructors_hashes["bot"]
+    ) is None
+
+    # `str` -> `null | str` is fine, but `bot` has been removed
+    widening = BSTranscoder(new, third)
+    assert widening.get(
+        new.constructors_hashes["user"], third.constructors_hashes["user"]
+    ) is not None
+    assert new.constructors_hashes["bot"] not in widening.routes
+    new_user_obj = widening.transcode(new_user.to_BS_object({"id": 42, "name": "Mark"}))
+    assert new_user_obj.data["name"].data == {"value": "Mark"}
+    assert third.used_constructors["user"].validate(_to_python(new_user_obj))
+    # `null` can't be stored in `name: str`
+    with pytest.raises(ValueError):
+        narrowing.transcode(old.used_constructors["user"].to_BS_object({
+            "id": 42,
+            "name": None
+        }))
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+
+
+def test_unchanged_scheme():
+    """
+    Testing that objects of the unchanged scheme are reused as is
+    """
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access
+    user_type, chat_type = _declare_old_version()
+    registry = BS.snapshot()
+    transcoder = BSTranscoder(registry, registry)
+    chat_obj = chat_type.to_BS_object({
+        "id": 1,
+        "owner": user_type.to_BS_object({"id": 42, "name": "Mark"})
+    })
+    assert transcoder.transcode(chat_obj) is chat_obj
+    assert transcoder.transcode(BSInt.to_BS_object(42)).data == {"value": 42}
+    BS._BSMeta__force_clear()  # pylint: disable = protected-access